@@ -0,0 +1,59 @@
+"""
+Per-task stdout capture for the standalone test scripts.
+
+Scripts that run their tests concurrently print into one buffer per task
+and write the buffers out in declaration order, so output never interleaves.
+"""
+
+import contextlib
+import contextvars
+import io
+import sys
+from typing import Any, Iterator, Optional, Tuple
+
+# Output buffer of the test running in the current task, if any
+_task_output: contextvars.ContextVar[Optional[io.StringIO]] = contextvars.ContextVar("task_output", default=None)
+
+class TaskStdout:
+    """stdout proxy routing writes to the current task's buffer.
+    
+    Everything else (isatty, encoding, fileno, ...) is delegated to the
+    real stream, so libraries inspecting stdout keep working.
+    """
+    
+    def __init__(self, stream):
+        self.stream = stream
+    
+    def write(self, text: str) -> int:
+        return (_task_output.get() or self.stream).write(text)
+    
+    def flush(self):
+        self.stream.flush()
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.stream, name)
+
+@contextlib.contextmanager
+def captured_stdout() -> Iterator[None]:
+    """Install TaskStdout as sys.stdout for the duration of the block."""
+    stdout = sys.stdout
+    sys.stdout = TaskStdout(stdout)
+    try:
+        yield
+    finally:
+        sys.stdout = stdout
+
+async def run_captured(test_func, *args, name: Optional[str] = None) -> Tuple[Any, str]:
+    """Run a test with its output captured, returning its result and output.
+    
+    Must run in its own task (gather/TaskGroup) so the buffer stays local to
+    it. A test that raises is reported as crashed and returns False.
+    """
+    buffer = io.StringIO()
+    _task_output.set(buffer)
+    try:
+        result = await test_func(*args)
+    except Exception as e:
+        print(f"❌ {name or test_func.__name__} crashed: {e}")
+        result = False
+    return result, buffer.getvalue()
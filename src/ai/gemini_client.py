@@ -51,14 +51,18 @@ class GeminiFunction:
 class GeminiClient:
     """Google Gemini API client with advanced features."""
     
-    def __init__(self, config: GeminiConfig):
+    def __init__(self, config: GeminiConfig, http_client: Optional[httpx.AsyncClient] = None):
         self.config = config
-        self.client = httpx.AsyncClient(
+        self.headers = {
+            "Content-Type": "application/json",
+            "x-goog-api-key": config.api_key
+        }
+        
+        # A caller-provided client is shared with other agents and stays open on close()
+        self._owns_client = http_client is None
+        self.client = http_client or httpx.AsyncClient(
             timeout=config.timeout,
-            headers={
-                "Content-Type": "application/json",
-                "x-goog-api-key": config.api_key
-            }
+            headers=self.headers
         )
         self.logger = logging.getLogger(f"{__name__}.GeminiClient")
         
@@ -81,7 +85,8 @@ class GeminiClient:
         """Test API connection."""
         try:
             response = await self.client.get(
-                f"{self.config.base_url}/models/{self.config.model}"
+                f"{self.config.base_url}/models/{self.config.model}",
+                headers=self.headers
             )
             if response.status_code != 200:
                 raise Exception(f"API test failed: {response.status_code}")
@@ -170,7 +175,8 @@ class GeminiClient:
         try:
             response = await self.client.post(
                 f"{self.config.base_url}/models/{self.config.model}:generateContent",
-                json=payload
+                json=payload,
+                headers=self.headers
             )
             
             if response.status_code == 200:
@@ -201,7 +207,8 @@ class GeminiClient:
                                 follow_up_payload = self._prepare_request_payload(follow_up_messages)
                                 follow_up_response = await self.client.post(
                                     f"{self.config.base_url}/models/{self.config.model}:generateContent",
-                                    json=follow_up_payload
+                                    json=follow_up_payload,
+                                    headers=self.headers
                                 )
                                 
                                 if follow_up_response.status_code == 200:
@@ -233,7 +240,8 @@ class GeminiClient:
             async with self.client.stream(
                 "POST",
                 f"{self.config.base_url}/models/{self.config.model}:streamGenerateContent",
-                json=payload
+                json=payload,
+                headers=self.headers
             ) as response:
                 if response.status_code == 200:
                     async for line in response.aiter_lines():
@@ -276,7 +284,8 @@ class GeminiClient:
     
     async def close(self):
         """Close the client."""
-        await self.client.aclose()
+        if self._owns_client:
+            await self.client.aclose()
 
 # Predefined functions for OpenManus-Youtu framework
 class OpenManusFunctions:
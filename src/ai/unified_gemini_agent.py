@@ -9,6 +9,7 @@ import logging
 from typing import Dict, Any, List, Optional, AsyncGenerator, Union
 from datetime import datetime
 from dataclasses import dataclass
+import httpx
 
 from ..core.unified_agent import UnifiedAgent
 from ..core.config import UnifiedConfig
@@ -52,7 +53,8 @@ class UnifiedGeminiAgent(UnifiedAgent):
         gemini_config: GeminiAgentConfig,
         tools: Optional[List[BaseTool]] = None,
         memory: Optional[UnifiedMemory] = None,
-        state: Optional[AgentState] = None
+        state: Optional[AgentState] = None,
+        http_client: Optional[httpx.AsyncClient] = None
     ):
         """
         Initialize the Unified Gemini Agent.
@@ -65,11 +67,13 @@ class UnifiedGeminiAgent(UnifiedAgent):
             tools: List of available tools
             memory: Memory management system
             state: Agent state
+            http_client: Shared HTTP client for Gemini requests (left open on close)
         """
         super().__init__(name, description, config, tools, memory, state)
         
         self.gemini_config = gemini_config
         self.gemini_client: Optional[GeminiClient] = None
+        self.http_client = http_client
         self.context_manager = ContextManager()
         self.standardizer = InputStandardizer()
         
@@ -103,7 +107,7 @@ class UnifiedGeminiAgent(UnifiedAgent):
                 max_tokens=self.gemini_config.max_tokens
             )
             
-            self.gemini_client = GeminiClient(gemini_client_config)
+            self.gemini_client = GeminiClient(gemini_client_config, http_client=self.http_client)
             
             if not await self.gemini_client.initialize():
                 logger.error("Failed to initialize Gemini client")
@@ -250,6 +254,7 @@ class UnifiedGeminiAgent(UnifiedAgent):
                 await self.context_manager.add_message(
                     user_id, session_id, "assistant", complete_response
                 )
+                yield complete_response
             
             # Update agent state
             await self._update_state("message_processed", {
@@ -262,6 +267,27 @@ class UnifiedGeminiAgent(UnifiedAgent):
             logger.error(f"Error processing message: {e}")
             yield f"Lỗi khi xử lý tin nhắn: {str(e)}"
     
+    async def request_message(
+        self,
+        user_input: str,
+        user_id: str = "default",
+        session_id: str = "default"
+    ) -> str:
+        """
+        Process user message and return the complete response.
+        
+        Args:
+            user_input: User's input message
+            user_id: User identifier
+            session_id: Session identifier
+            
+        Returns:
+            Complete response from Gemini AI
+        """
+        return "".join([
+            chunk async for chunk in self.process_message(user_input, user_id, session_id, stream=False)
+        ])
+    
     def _convert_to_gemini_messages(self, messages: List) -> List[GeminiMessage]:
         """Convert context messages to Gemini format."""
         gemini_messages = []
@@ -511,7 +537,8 @@ async def create_unified_gemini_agent(
         config=config,
         gemini_config=gemini_config,
         tools=tools,
-        memory=memory
+        memory=memory,
+        http_client=kwargs.get("http_client")
     )
     
     # Initialize agent
@@ -11,6 +11,8 @@ from .models import (
     AgentResponse,
     ToolRequest,
     ToolResponse,
+    ToolBatchRequest,
+    ToolBatchResponse,
     WorkflowRequest,
     WorkflowResponse,
     HealthResponse
@@ -24,6 +26,8 @@ __all__ = [
     "AgentResponse",
     "ToolRequest",
     "ToolResponse",
+    "ToolBatchRequest",
+    "ToolBatchResponse",
     "WorkflowRequest",
     "WorkflowResponse",
     "HealthResponse"
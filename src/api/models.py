@@ -94,6 +94,16 @@ class ToolResponse(BaseModel):
     metadata: Optional[Dict[str, Any]] = Field(default=None, description="Additional metadata")
 
 
+class ToolBatchRequest(BaseModel):
+    """Batch tool execution request model."""
+    requests: List[ToolRequest] = Field(..., description="Tool executions to run")
+
+
+class ToolBatchResponse(BaseModel):
+    """Batch tool execution response model."""
+    results: List[ToolResponse] = Field(..., description="Results in request order")
+
+
 class WorkflowStep(BaseModel):
     """Workflow step model."""
     step_id: str = Field(..., description="Unique step identifier")
@@ -7,6 +7,7 @@ This module defines FastAPI routes for the unified framework API.
 from typing import Dict, List, Any, Optional
 from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
 from fastapi.responses import JSONResponse
+import asyncio
 import time
 import uuid
 from datetime import datetime
@@ -16,6 +17,8 @@ from .models import (
     AgentResponse,
     ToolRequest,
     ToolResponse,
+    ToolBatchRequest,
+    ToolBatchResponse,
     WorkflowRequest,
     WorkflowResponse,
     HealthResponse,
@@ -154,6 +157,26 @@ async def execute_tool(request: ToolRequest):
         )
 
 
+@router.post("/tools/execute:batch", response_model=ToolBatchResponse)
+async def execute_tools_batch(request: ToolBatchRequest):
+    """Execute several tools concurrently in one request."""
+    async def execute_one(tool_request: ToolRequest) -> ToolResponse:
+        try:
+            return await execute_tool(tool_request)
+        except HTTPException as e:
+            return ToolResponse(
+                success=False,
+                error=str(e.detail),
+                metadata={
+                    "tool_name": tool_request.tool_name,
+                    "timestamp": datetime.now().isoformat()
+                }
+            )
+    
+    results = await asyncio.gather(*(execute_one(r) for r in request.requests))
+    return ToolBatchResponse(results=results)
+
+
 @router.post("/agents/create", response_model=AgentResponse)
 async def create_agent(request: AgentRequest):
     """Create a new agent."""
@@ -211,6 +234,18 @@ async def create_agent(request: AgentRequest):
         )
 
 
+@router.post("/agents/bulk_create", response_model=List[AgentResponse])
+async def bulk_create_agents(requests: List[AgentRequest]):
+    """Create several agents in one request."""
+    async def create_one(request: AgentRequest) -> AgentResponse:
+        try:
+            return await create_agent(request)
+        except HTTPException as e:
+            return AgentResponse(success=False, error=str(e.detail))
+    
+    return await asyncio.gather(*(create_one(request) for request in requests))
+
+
 @router.post("/agents/{agent_id}/execute", response_model=AgentResponse)
 async def execute_agent(agent_id: str, request: AgentRequest):
     """Execute a task with an agent."""
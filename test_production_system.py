@@ -6,83 +6,179 @@ Tests all components: Telegram Bot, Web Interface, API, ngrok, and AI Agents
 
 import asyncio
 import httpx
-import json
+import orjson
+import re
 import time
 import os
+import socket
 import sys
+from contextlib import asynccontextmanager
 from pathlib import Path
+from urllib.parse import urlparse
 from typing import Dict, Any, List
 from datetime import datetime
 
+# Compiled once: any non-ASCII character marks Vietnamese text, and the CCCD
+# indicators are matched in a single case-insensitive pass
+NON_ASCII_RE = re.compile(r'[^\x00-\x7f]')
+CCCD_RE = re.compile(r'cccd|căn cước|hưng yên|1965|1975|nữ', re.IGNORECASE)
+
+CHAT_PATH = "/api/v1/agents/test_agent/chat/message"
+GEMINI_HOST = "generativelanguage.googleapis.com"
+
+# Chat request bodies serialized once and sent as raw bytes
+JSON_HEADERS = {"content-type": "application/json"}
+VIETNAMESE_CHAT_BODY = orjson.dumps({
+    "message": "Xin chào! Bạn có thể giúp tôi tạo 10 CCCD cho tỉnh Hà Nội không?",
+    "session_id": "test_session",
+    "stream": True
+})
+CCCD_CHAT_BODY = orjson.dumps({
+    "message": "Tạo 5 CCCD cho tỉnh Hưng Yên, giới tính nữ, năm sinh từ 1965 đến 1975",
+    "session_id": "cccd_test_session",
+    "stream": True
+})
+
+CCCD_INDICATORS = ("cccd", "căn cước", "hưng yên", "1965", "1975", "nữ")
+
+# Characters of already-seen reply text rescanned with each streamed chunk,
+# enough for an indicator split across two chunks
+STREAM_OVERLAP = max(len(indicator) for indicator in CCCD_INDICATORS) - 1
+
+# Multi-pattern Aho-Corasick automaton for the CCCD indicators when
+# pyahocorasick is installed; the compiled regex is the fallback
+try:
+    import ahocorasick
+    
+    CCCD_AUTOMATON = ahocorasick.Automaton()
+    for indicator in CCCD_INDICATORS:
+        CCCD_AUTOMATON.add_word(indicator, indicator)
+    CCCD_AUTOMATON.make_automaton()
+except ImportError:
+    CCCD_AUTOMATON = None
+
+def find_cccd_indicators(text: str) -> set:
+    """Return the distinct CCCD indicators present in text."""
+    if CCCD_AUTOMATON is not None:
+        return {indicator for _, indicator in CCCD_AUTOMATON.iter(text.lower())}
+    return {match.group(0).lower() for match in CCCD_RE.finditer(text)}
+
+def count_cccd_indicators(text: str) -> int:
+    """Count the distinct CCCD indicators present in text."""
+    return len(find_cccd_indicators(text))
+
 # Add src to path
 sys.path.append(str(Path(__file__).parent / "src"))
 
+# Read timeouts per kind of endpoint; connect and pool waits are capped
+# separately on the clients so a stuck DNS lookup or full pool fails fast
+HTTP_TIMEOUTS = {"health": 5.0, "api": 10.0, "gemini": 15.0, "chat": 15.0}
+CLIENT_TIMEOUT = httpx.Timeout(10.0, connect=1.0, pool=1.0)
+REQUEST_TIMEOUTS = {
+    kind: httpx.Timeout(read, connect=CLIENT_TIMEOUT.connect, pool=CLIENT_TIMEOUT.pool)
+    for kind, read in HTTP_TIMEOUTS.items()
+}
+
+# Number of concurrent health checks in the performance burst
+PERFORMANCE_REQUESTS = 100
+
 class ProductionSystemTester:
     """Comprehensive production system tester."""
     
     def __init__(self):
         self.base_url = "https://choice-swine-on.ngrok-free.app"
         self.local_url = "http://localhost:80"
+        self.api_key = os.getenv("GEMINI_API_KEY")
         self.test_results = []
-        self.start_time = time.time()
+        self.start_time = time.perf_counter()
         
-    def log_test(self, test_name: str, success: bool, message: str = "", duration: float = 0):
-        """Log test result."""
-        status = "✅ PASS" if success else "❌ FAIL"
-        duration_str = f"({duration:.2f}s)" if duration > 0 else ""
-        
-        print(f"{status} {test_name} {duration_str}: {message}")
+        # Pooled clients shared by every test so keep-alive connections
+        # (and their TLS sessions) are reused instead of reopened per test.
+        # HTTP/2 multiplexes concurrent requests over one ngrok connection.
+        limits = httpx.Limits(max_keepalive_connections=50, max_connections=100)
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=CLIENT_TIMEOUT,
+            transport=httpx.AsyncHTTPTransport(limits=limits, http2=True, retries=2)
+        )
+        # Disable Nagle on local sockets so small requests are sent immediately
+        self.local_client = httpx.AsyncClient(
+            base_url=self.local_url,
+            timeout=CLIENT_TIMEOUT,
+            transport=httpx.AsyncHTTPTransport(
+                limits=limits,
+                retries=2,
+                socket_options=[(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)]
+            )
+        )
         
+    def log_test(self, test_name: str, success: bool, message: str = "", duration: float = 0):
+        """Record test result; output lines are built in flush_log."""
         self.test_results.append({
             "test_name": test_name,
             "success": success,
             "message": message,
             "duration": duration,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": time.time()
         })
     
-    async def test_ngrok_tunnel(self) -> bool:
-        """Test ngrok tunnel connectivity."""
-        start_time = time.time()
+    def flush_log(self):
+        """Write all recorded results to stdout in a single call."""
+        lines = []
+        for result in self.test_results:
+            status = "✅ PASS" if result["success"] else "❌ FAIL"
+            duration_str = f"({result['duration']:.2f}s)" if result["duration"] > 0 else ""
+            lines.append(f"{status} {result['test_name']} {duration_str}: {result['message']}")
+        
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
+    
+    @asynccontextmanager
+    async def _timed(self, test_name: str, error_prefix: str):
+        """Time a test body, logging any exception it raises as a failure.
+        
+        Yields a callable returning the elapsed seconds. Exceptions are
+        re-raised after logging; _run_one turns them into a failed result.
+        """
+        start = time.perf_counter_ns()
+        
+        def elapsed() -> float:
+            return (time.perf_counter_ns() - start) / 1e9
         
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(f"{self.base_url}/health")
-                
-                if response.status_code == 200:
-                    self.log_test("ngrok Tunnel", True, f"Public URL accessible: {response.status_code}", time.time() - start_time)
-                    return True
-                else:
-                    self.log_test("ngrok Tunnel", False, f"Unexpected status: {response.status_code}", time.time() - start_time)
-                    return False
-                    
+            yield elapsed
         except Exception as e:
-            self.log_test("ngrok Tunnel", False, f"Connection failed: {str(e)}", time.time() - start_time)
-            return False
+            self.log_test(test_name, False, f"{error_prefix}: {str(e)}", elapsed())
+            raise
+    
+    async def test_ngrok_tunnel(self) -> bool:
+        """Test ngrok tunnel connectivity."""
+        async with self._timed("ngrok Tunnel", "Connection failed") as elapsed:
+            response = await self.client.get("/health", timeout=REQUEST_TIMEOUTS["health"])
+            
+            if response.status_code == 200:
+                success, message = True, f"Public URL accessible: {response.status_code}"
+            else:
+                success, message = False, f"Unexpected status: {response.status_code}"
+        
+        self.log_test("ngrok Tunnel", success, message, elapsed())
+        return success
     
     async def test_local_server(self) -> bool:
         """Test local server connectivity."""
-        start_time = time.time()
+        async with self._timed("Local Server", "Connection failed") as elapsed:
+            response = await self.local_client.get("/health", timeout=REQUEST_TIMEOUTS["health"])
+            
+            if response.status_code == 200:
+                success, message = True, f"Local server accessible: {response.status_code}"
+            else:
+                success, message = False, f"Unexpected status: {response.status_code}"
         
-        try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                response = await client.get(f"{self.local_url}/health")
-                
-                if response.status_code == 200:
-                    self.log_test("Local Server", True, f"Local server accessible: {response.status_code}", time.time() - start_time)
-                    return True
-                else:
-                    self.log_test("Local Server", False, f"Unexpected status: {response.status_code}", time.time() - start_time)
-                    return False
-                    
-        except Exception as e:
-            self.log_test("Local Server", False, f"Connection failed: {str(e)}", time.time() - start_time)
-            return False
+        self.log_test("Local Server", success, message, elapsed())
+        return success
     
     async def test_api_endpoints(self) -> bool:
         """Test API endpoints."""
-        start_time = time.time()
-        
         endpoints = [
             ("/health", "Health Check"),
             ("/status", "System Status"),
@@ -93,270 +189,285 @@ class ProductionSystemTester:
         ]
         
         success_count = 0
+        warnings = []
         
-        try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                for endpoint, name in endpoints:
-                    try:
-                        response = await client.get(f"{self.base_url}{endpoint}")
-                        if response.status_code in [200, 404]:  # 404 is OK for some endpoints
-                            success_count += 1
-                        else:
-                            print(f"  ⚠️ {name}: Status {response.status_code}")
-                    except Exception as e:
-                        print(f"  ⚠️ {name}: {str(e)}")
-                
-                success_rate = success_count / len(endpoints)
-                if success_rate >= 0.8:  # 80% success rate
-                    self.log_test("API Endpoints", True, f"Success rate: {success_rate:.1%} ({success_count}/{len(endpoints)})", time.time() - start_time)
-                    return True
+        async with self._timed("API Endpoints", "Test failed") as elapsed:
+            # Probe all endpoints concurrently over the pooled client
+            tasks = [self.client.get(endpoint, timeout=REQUEST_TIMEOUTS["api"]) for endpoint, _ in endpoints]
+            responses = await asyncio.gather(*tasks, return_exceptions=True)
+            
+            for (endpoint, name), response in zip(endpoints, responses):
+                if isinstance(response, Exception):
+                    warnings.append(f"⚠️ {name}: {str(response)}")
+                elif response.status_code == 200 or response.status_code == 404:  # 404 is OK for some endpoints
+                    success_count += 1
                 else:
-                    self.log_test("API Endpoints", False, f"Success rate too low: {success_rate:.1%}", time.time() - start_time)
-                    return False
-                    
-        except Exception as e:
-            self.log_test("API Endpoints", False, f"Test failed: {str(e)}", time.time() - start_time)
-            return False
+                    warnings.append(f"⚠️ {name}: Status {response.status_code}")
+            
+            success_rate = success_count / len(endpoints)
+            if success_rate >= 0.8:  # 80% success rate
+                success, message = True, f"Success rate: {success_rate:.1%} ({success_count}/{len(endpoints)})"
+            else:
+                success, message = False, f"Success rate too low: {success_rate:.1%}"
+            
+            # Endpoint warnings go out with the result in flush_log
+            if warnings:
+                message += " " + "; ".join(warnings)
+        
+        self.log_test("API Endpoints", success, message, elapsed())
+        return success
     
     async def test_telegram_webhook(self) -> bool:
         """Test Telegram webhook endpoint."""
-        start_time = time.time()
-        
-        try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                # Test webhook info endpoint
-                response = await client.get(f"{self.base_url}/webhook/telegram")
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    if "webhook_info" in data or "error" in data:
-                        self.log_test("Telegram Webhook", True, f"Webhook endpoint accessible: {response.status_code}", time.time() - start_time)
-                        return True
-                    else:
-                        self.log_test("Telegram Webhook", False, "Invalid webhook response", time.time() - start_time)
-                        return False
+        async with self._timed("Telegram Webhook", "Connection failed") as elapsed:
+            # Test webhook info endpoint
+            response = await self.client.get("/webhook/telegram", timeout=REQUEST_TIMEOUTS["api"])
+            
+            if response.status_code != 200:
+                success, message = False, f"Unexpected status: {response.status_code}"
+            else:
+                data = orjson.loads(response.content)
+                if "webhook_info" in data or "error" in data:
+                    success, message = True, f"Webhook endpoint accessible: {response.status_code}"
                 else:
-                    self.log_test("Telegram Webhook", False, f"Unexpected status: {response.status_code}", time.time() - start_time)
-                    return False
-                    
-        except Exception as e:
-            self.log_test("Telegram Webhook", False, f"Connection failed: {str(e)}", time.time() - start_time)
-            return False
+                    success, message = False, "Invalid webhook response"
+        
+        self.log_test("Telegram Webhook", success, message, elapsed())
+        return success
     
     async def test_gemini_integration(self) -> bool:
         """Test Gemini AI integration."""
-        start_time = time.time()
-        
-        try:
+        async with self._timed("Gemini Integration", "Connection failed") as elapsed:
             # Test Gemini API key
-            api_key = os.getenv("GEMINI_API_KEY")
+            api_key = self.api_key
             if not api_key:
-                self.log_test("Gemini Integration", False, "API key not configured", time.time() - start_time)
-                return False
-            
-            # Test Gemini API connection
-            async with httpx.AsyncClient(timeout=15.0) as client:
+                success, message = False, "API key not configured"
+            else:
+                # Test Gemini API connection
                 headers = {"X-goog-api-key": api_key}
-                response = await client.get(
-                    "https://generativelanguage.googleapis.com/v1beta/models",
-                    headers=headers
+                response = await self.client.get(
+                    f"https://{GEMINI_HOST}/v1beta/models",
+                    headers=headers,
+                    timeout=REQUEST_TIMEOUTS["gemini"]
                 )
                 
-                if response.status_code == 200:
-                    models = response.json()
-                    if "models" in models:
-                        self.log_test("Gemini Integration", True, f"Connected to Gemini API, {len(models['models'])} models available", time.time() - start_time)
-                        return True
-                    else:
-                        self.log_test("Gemini Integration", False, "Invalid API response", time.time() - start_time)
-                        return False
+                if response.status_code != 200:
+                    success, message = False, f"API error: {response.status_code}"
                 else:
-                    self.log_test("Gemini Integration", False, f"API error: {response.status_code}", time.time() - start_time)
-                    return False
-                    
-        except Exception as e:
-            self.log_test("Gemini Integration", False, f"Connection failed: {str(e)}", time.time() - start_time)
-            return False
+                    models = orjson.loads(response.content).get("models")
+                    if models is not None:
+                        success, message = True, f"Connected to Gemini API, {len(models)} models available"
+                    else:
+                        success, message = False, "Invalid API response"
+        
+        self.log_test("Gemini Integration", success, message, elapsed())
+        return success
     
     async def test_ai_agent_creation(self) -> bool:
         """Test AI agent creation."""
-        start_time = time.time()
-        
-        try:
-            async with httpx.AsyncClient(timeout=15.0) as client:
-                # Test agent creation
-                agent_data = {
-                    "agent_type": "cccd",
-                    "name": "test_agent",
-                    "api_key": os.getenv("GEMINI_API_KEY"),
-                    "config": {}
-                }
-                
-                response = await client.post(
-                    f"{self.base_url}/api/v1/agents/create",
-                    json=agent_data,
-                    timeout=15.0
-                )
-                
-                if response.status_code in [200, 201]:
-                    data = response.json()
-                    if data.get("success"):
-                        self.log_test("AI Agent Creation", True, f"Agent created successfully: {data.get('agent_name', 'Unknown')}", time.time() - start_time)
-                        return True
-                    else:
-                        self.log_test("AI Agent Creation", False, f"Agent creation failed: {data.get('error', 'Unknown error')}", time.time() - start_time)
-                        return False
+        async with self._timed("AI Agent Creation", "Request failed") as elapsed:
+            # Test agent creation
+            agent_data = {
+                "agent_type": "cccd",
+                "name": "test_agent",
+                "api_key": self.api_key,
+                "config": {}
+            }
+            
+            response = await self.client.post(
+                "/api/v1/agents/create",
+                json=agent_data,
+                timeout=REQUEST_TIMEOUTS["api"]
+            )
+            
+            if not response.is_success:
+                success, message = False, f"HTTP error: {response.status_code}"
+            else:
+                data = orjson.loads(response.content)
+                if data.get("success"):
+                    success, message = True, f"Agent created successfully: {data.get('agent_name', 'Unknown')}"
                 else:
-                    self.log_test("AI Agent Creation", False, f"HTTP error: {response.status_code}", time.time() - start_time)
-                    return False
-                    
-        except Exception as e:
-            self.log_test("AI Agent Creation", False, f"Request failed: {str(e)}", time.time() - start_time)
-            return False
+                    success, message = False, f"Agent creation failed: {data.get('error', 'Unknown error')}"
+        
+        self.log_test("AI Agent Creation", success, message, elapsed())
+        return success
+    
+    async def _stream_chat(self, body: bytes, enough) -> tuple:
+        """Stream a chat reply, stopping as soon as ``enough(window)`` is true.
+        
+        ``enough`` sees each new chunk prefixed with the last STREAM_OVERLAP
+        characters before it, never the whole reply, so the check stays
+        linear in reply length; checks spanning the reply keep their own state.
+        Returns the HTTP status code and a dict shaped like the non-streaming
+        reply (``success``, ``response``, ``error``).
+        """
+        async with self.client.stream(
+            "POST", CHAT_PATH, content=body, headers=JSON_HEADERS, timeout=REQUEST_TIMEOUTS["chat"]
+        ) as response:
+            if not response.is_success:
+                return response.status_code, {}
+            
+            # Servers that ignore the stream flag answer with plain JSON
+            if response.headers.get("content-type", "").startswith("application/json"):
+                return response.status_code, orjson.loads(await response.aread())
+            
+            parts = []
+            tail = ""
+            async for line in response.aiter_lines():
+                if not line.startswith("data: ") or line == "data: [DONE]":
+                    continue
+                event = orjson.loads(line[len("data: "):])
+                if "error" in event:
+                    return response.status_code, {"success": False, "error": event["error"]}
+                chunk = event.get("content", "")
+                parts.append(chunk)
+                window = tail + chunk
+                if enough(window):
+                    break
+                tail = window[-STREAM_OVERLAP:]
+            
+            text = "".join(parts)
+            return response.status_code, {"success": bool(text), "response": text}
     
     async def test_vietnamese_language_support(self) -> bool:
         """Test Vietnamese language support."""
-        start_time = time.time()
+        async with self._timed("Vietnamese Language Support", "Request failed") as elapsed:
+            # Test Vietnamese message processing, stopping as soon as the
+            # reply satisfies the check
+            status_code, data = await self._stream_chat(VIETNAMESE_CHAT_BODY, lambda window: NON_ASCII_RE.search(window) is not None)
+            
+            if not 200 <= status_code < 300:
+                success, message = False, f"HTTP error: {status_code}"
+            elif not (data.get("success") and data.get("response")):
+                success, message = False, f"Invalid response: {data.get('error', 'Unknown')}"
+            # Check if response contains Vietnamese characters
+            elif NON_ASCII_RE.search(data["response"]):
+                success, message = True, "Vietnamese text processing successful"
+            else:
+                success, message = False, "No Vietnamese characters in response"
         
-        try:
-            async with httpx.AsyncClient(timeout=15.0) as client:
-                # Test Vietnamese message processing
-                test_message = {
-                    "message": "Xin chào! Bạn có thể giúp tôi tạo 10 CCCD cho tỉnh Hà Nội không?",
-                    "session_id": "test_session",
-                    "stream": False
-                }
-                
-                response = await client.post(
-                    f"{self.base_url}/api/v1/agents/test_agent/chat/message",
-                    json=test_message,
-                    timeout=15.0
-                )
-                
-                if response.status_code in [200, 201]:
-                    data = response.json()
-                    if data.get("success") and data.get("response"):
-                        response_text = data["response"]
-                        # Check if response contains Vietnamese characters
-                        vietnamese_chars = any(ord(char) > 127 for char in response_text)
-                        if vietnamese_chars:
-                            self.log_test("Vietnamese Language Support", True, "Vietnamese text processing successful", time.time() - start_time)
-                            return True
-                        else:
-                            self.log_test("Vietnamese Language Support", False, "No Vietnamese characters in response", time.time() - start_time)
-                            return False
-                    else:
-                        self.log_test("Vietnamese Language Support", False, f"Invalid response: {data.get('error', 'Unknown')}", time.time() - start_time)
-                        return False
-                else:
-                    self.log_test("Vietnamese Language Support", False, f"HTTP error: {response.status_code}", time.time() - start_time)
-                    return False
-                    
-        except Exception as e:
-            self.log_test("Vietnamese Language Support", False, f"Request failed: {str(e)}", time.time() - start_time)
-            return False
+        self.log_test("Vietnamese Language Support", success, message, elapsed())
+        return success
     
     async def test_cccd_functionality(self) -> bool:
         """Test CCCD generation functionality."""
-        start_time = time.time()
-        
-        try:
-            async with httpx.AsyncClient(timeout=15.0) as client:
-                # Test CCCD generation
-                cccd_request = {
-                    "message": "Tạo 5 CCCD cho tỉnh Hưng Yên, giới tính nữ, năm sinh từ 1965 đến 1975",
-                    "session_id": "cccd_test_session",
-                    "stream": False
-                }
-                
-                response = await client.post(
-                    f"{self.base_url}/api/v1/agents/test_agent/chat/message",
-                    json=cccd_request,
-                    timeout=15.0
-                )
-                
-                if response.status_code in [200, 201]:
-                    data = response.json()
-                    if data.get("success") and data.get("response"):
-                        response_text = data["response"]
-                        # Check if response contains CCCD-related content
-                        cccd_indicators = ["CCCD", "căn cước", "Hưng Yên", "1965", "1975", "nữ"]
-                        found_indicators = sum(1 for indicator in cccd_indicators if indicator.lower() in response_text.lower())
-                        
-                        if found_indicators >= 3:
-                            self.log_test("CCCD Functionality", True, f"CCCD generation successful, {found_indicators} indicators found", time.time() - start_time)
-                            return True
-                        else:
-                            self.log_test("CCCD Functionality", False, f"Limited CCCD content, {found_indicators} indicators found", time.time() - start_time)
-                            return False
-                    else:
-                        self.log_test("CCCD Functionality", False, f"Invalid response: {data.get('error', 'Unknown')}", time.time() - start_time)
-                        return False
+        async with self._timed("CCCD Functionality", "Request failed") as elapsed:
+            # Test CCCD generation, stopping as soon as the reply satisfies
+            # the check
+            found = set()
+            
+            def enough(window: str) -> bool:
+                found.update(find_cccd_indicators(window))
+                return len(found) >= 3
+            
+            status_code, data = await self._stream_chat(CCCD_CHAT_BODY, enough)
+            
+            if not 200 <= status_code < 300:
+                success, message = False, f"HTTP error: {status_code}"
+            elif not (data.get("success") and data.get("response")):
+                success, message = False, f"Invalid response: {data.get('error', 'Unknown')}"
+            else:
+                # Check if response contains CCCD-related content
+                found_indicators = count_cccd_indicators(data["response"])
+                if found_indicators >= 3:
+                    success, message = True, f"CCCD generation successful, {found_indicators} indicators found"
                 else:
-                    self.log_test("CCCD Functionality", False, f"HTTP error: {response.status_code}", time.time() - start_time)
-                    return False
-                    
-        except Exception as e:
-            self.log_test("CCCD Functionality", False, f"Request failed: {str(e)}", time.time() - start_time)
-            return False
+                    success, message = False, f"Limited CCCD content, {found_indicators} indicators found"
+        
+        self.log_test("CCCD Functionality", success, message, elapsed())
+        return success
     
     async def test_performance(self) -> bool:
         """Test system performance."""
-        start_time = time.time()
+        async with self._timed("Performance", "Performance test failed") as elapsed:
+            # Concurrent burst over the pooled keep-alive client; no pool/connect
+            # timeout so queueing under load is not reported as a failure
+            timeout = httpx.Timeout(HTTP_TIMEOUTS["health"], connect=None, pool=None)
+            burst_start = time.perf_counter()
+            responses = await asyncio.gather(
+                *(self.client.get("/health", timeout=timeout) for _ in range(PERFORMANCE_REQUESTS)),
+                return_exceptions=True
+            )
+            wall_time = time.perf_counter() - burst_start
+            
+            latencies = sorted(
+                r.elapsed.total_seconds() for r in responses
+                if not isinstance(r, Exception) and r.status_code == 200
+            )
+            success_count = len(latencies)
+            throughput = PERFORMANCE_REQUESTS / wall_time
+            p95 = latencies[int(0.95 * (success_count - 1))] if latencies else float("inf")
+            summary = f"{success_count}/{PERFORMANCE_REQUESTS} success, {throughput:.1f} req/s, p95 {p95:.2f}s"
+            
+            if success_count >= PERFORMANCE_REQUESTS * 0.8 and p95 < 2.0:  # 80% success, <2s p95
+                success, message = True, f"Concurrent requests: {summary}"
+            else:
+                success, message = False, f"Performance issues: {summary}"
         
-        try:
-            # Test concurrent requests
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                tasks = []
-                for i in range(5):
-                    task = client.get(f"{self.base_url}/health")
-                    tasks.append(task)
-                
-                responses = await asyncio.gather(*tasks, return_exceptions=True)
-                
-                success_count = sum(1 for r in responses if not isinstance(r, Exception) and r.status_code == 200)
-                avg_time = (time.time() - start_time) / len(tasks)
-                
-                if success_count >= 4 and avg_time < 2.0:  # 80% success, <2s average
-                    self.log_test("Performance", True, f"Concurrent requests: {success_count}/{len(tasks)} success, avg {avg_time:.2f}s", time.time() - start_time)
-                    return True
-                else:
-                    self.log_test("Performance", False, f"Performance issues: {success_count}/{len(tasks)} success, avg {avg_time:.2f}s", time.time() - start_time)
-                    return False
-                    
-        except Exception as e:
-            self.log_test("Performance", False, f"Performance test failed: {str(e)}", time.time() - start_time)
+        self.log_test("Performance", success, message, elapsed())
+        return success
+    
+    async def _run_one(self, test_name: str, test_func, deps: Dict[str, asyncio.Task], sem: asyncio.Semaphore) -> bool:
+        """Run a single test under the concurrency limit once its dependencies pass."""
+        failed_deps = [dep_name for dep_name, dep_task in deps.items() if not await dep_task]
+        if failed_deps:
+            self.log_test(test_name, False, f"SKIPPED (dep: {', '.join(failed_deps)})")
             return False
+        
+        async with sem:
+            try:
+                result = bool(await test_func())
+            except Exception:
+                # _timed has already logged the failure
+                result = False
+        
+        return result
     
     async def run_all_tests(self) -> Dict[str, Any]:
         """Run all tests."""
         print("🧪 Starting Comprehensive Production System Tests...")
         print("=" * 60)
         
+        # Resolve remote hosts in the background so the tests that need them
+        # find the resolver cache warm
+        loop = asyncio.get_running_loop()
+        dns_warmup = asyncio.gather(
+            loop.getaddrinfo(GEMINI_HOST, 443),
+            loop.getaddrinfo(urlparse(self.base_url).hostname, 443),
+            return_exceptions=True
+        )
+        
+        # (name, test, dependencies) in dependency order; every test starts as
+        # soon as its dependencies pass and is skipped if any of them fail
         tests = [
-            ("ngrok Tunnel", self.test_ngrok_tunnel),
-            ("Local Server", self.test_local_server),
-            ("API Endpoints", self.test_api_endpoints),
-            ("Telegram Webhook", self.test_telegram_webhook),
-            ("Gemini Integration", self.test_gemini_integration),
-            ("AI Agent Creation", self.test_ai_agent_creation),
-            ("Vietnamese Language Support", self.test_vietnamese_language_support),
-            ("CCCD Functionality", self.test_cccd_functionality),
-            ("Performance", self.test_performance)
+            ("ngrok Tunnel", self.test_ngrok_tunnel, []),
+            ("Local Server", self.test_local_server, []),
+            ("Gemini Integration", self.test_gemini_integration, []),
+            ("API Endpoints", self.test_api_endpoints, ["ngrok Tunnel"]),
+            ("Telegram Webhook", self.test_telegram_webhook, ["ngrok Tunnel"]),
+            ("AI Agent Creation", self.test_ai_agent_creation, ["ngrok Tunnel"]),
+            ("Vietnamese Language Support", self.test_vietnamese_language_support, ["AI Agent Creation"]),
+            ("CCCD Functionality", self.test_cccd_functionality, ["AI Agent Creation"]),
+            ("Performance", self.test_performance, ["ngrok Tunnel"])
         ]
         
-        passed = 0
         total = len(tests)
         
-        for test_name, test_func in tests:
-            try:
-                result = await test_func()
-                if result:
-                    passed += 1
-            except Exception as e:
-                self.log_test(test_name, False, f"Test exception: {str(e)}")
+        # Bound concurrency to stay under ngrok's rate limit
+        sem = asyncio.Semaphore(4)
+        
+        async with self.client, self.local_client:
+            tasks = {}
+            for test_name, test_func, deps in tests:
+                tasks[test_name] = asyncio.create_task(
+                    self._run_one(test_name, test_func, {dep: tasks[dep] for dep in deps}, sem)
+                )
+            passed = sum(await asyncio.gather(*tasks.values()))
         
-        total_time = time.time() - self.start_time
+        await dns_warmup
+        self.flush_log()
+        
+        total_time = time.perf_counter() - self.start_time
         success_rate = passed / total
         
         print("=" * 60)
@@ -373,8 +484,11 @@ class ProductionSystemTester:
             "passed_tests": passed,
             "success_rate": success_rate,
             "total_time": total_time,
-            "test_results": self.test_results,
-            "timestamp": datetime.now().isoformat()
+            "test_results": [
+                {**result, "timestamp": datetime.fromtimestamp(result["timestamp"])}
+                for result in self.test_results
+            ],
+            "timestamp": datetime.now()
         }
 
 async def main():
@@ -383,12 +497,21 @@ async def main():
     results = await tester.run_all_tests()
     
     # Save results
-    with open("production_test_results.json", "w") as f:
-        json.dump(results, f, indent=2)
+    # orjson serializes the datetime timestamps natively
+    with open("production_test_results.json", "wb") as f:
+        f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2))
     
     print(f"\n📊 Test results saved to: production_test_results.json")
     
     return results
 
 if __name__ == "__main__":
+    # uvloop has lower per-await dispatch cost; not available on Windows
+    if sys.platform != "win32":
+        try:
+            import uvloop
+            uvloop.install()
+        except ImportError:
+            pass
+    
     asyncio.run(main())
\ No newline at end of file
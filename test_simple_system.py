@@ -4,20 +4,32 @@ Simple System Test for OpenManus-Youtu Integrated Framework
 Tests local server and basic functionality
 """
 
-import requests
-import json
+import asyncio
+import httpx
+import orjson
+import re
+import sys
 import time
 from datetime import datetime
 
-def test_local_server():
+from script_output import captured_stdout, run_captured
+
+# Compiled once: any non-ASCII character marks Vietnamese text, and the CCCD
+# indicators are matched in a single case-insensitive pass
+NON_ASCII_RE = re.compile(r'[^\x00-\x7f]')
+CCCD_RE = re.compile(r'cccd|căn cước|hưng yên|1965|1975|nữ', re.IGNORECASE)
+
+BASE_URL = "http://localhost:8000"
+
+async def test_local_server(client: httpx.AsyncClient):
     """Test local server."""
     print("🧪 Testing Local Server...")
     
     try:
         # Test health endpoint
-        response = requests.get("http://localhost:8000/health", timeout=5)
+        response = await client.get("/health")
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             print(f"✅ Health Check: {data['status']}")
             return True
         else:
@@ -27,7 +39,7 @@ def test_local_server():
         print(f"❌ Local Server Error: {e}")
         return False
 
-def test_api_endpoints():
+async def test_api_endpoints(client: httpx.AsyncClient):
     """Test API endpoints."""
     print("\n🧪 Testing API Endpoints...")
     
@@ -43,22 +55,24 @@ def test_api_endpoints():
     
     success_count = 0
     
-    for endpoint, name in endpoints:
-        try:
-            response = requests.get(f"http://localhost:8000{endpoint}", timeout=5)
-            if response.status_code in [200, 404]:  # 404 is OK for some endpoints
-                print(f"✅ {name}: {response.status_code}")
-                success_count += 1
-            else:
-                print(f"⚠️ {name}: {response.status_code}")
-        except Exception as e:
-            print(f"❌ {name}: {e}")
+    # Probe all endpoints concurrently over the pooled client
+    tasks = [client.get(endpoint) for endpoint, _ in endpoints]
+    responses = await asyncio.gather(*tasks, return_exceptions=True)
+    
+    for (endpoint, name), response in zip(endpoints, responses):
+        if isinstance(response, Exception):
+            print(f"❌ {name}: {response}")
+        elif response.status_code == 200 or response.status_code == 404:  # 404 is OK for some endpoints
+            print(f"✅ {name}: {response.status_code}")
+            success_count += 1
+        else:
+            print(f"⚠️ {name}: {response.status_code}")
     
     success_rate = success_count / len(endpoints)
     print(f"\n📊 API Endpoints Success Rate: {success_rate:.1%} ({success_count}/{len(endpoints)})")
     return success_rate >= 0.8
 
-def test_agent_creation():
+async def test_agent_creation(client: httpx.AsyncClient):
     """Test agent creation."""
     print("\n🧪 Testing Agent Creation...")
     
@@ -69,14 +83,14 @@ def test_agent_creation():
             "api_key": "test_key"
         }
         
-        response = requests.post(
-            "http://localhost:8000/api/v1/agents/create",
+        response = await client.post(
+            "/api/v1/agents/create",
             json=agent_data,
             timeout=10
         )
         
-        if response.status_code in [200, 201]:
-            data = response.json()
+        if response.is_success:
+            data = orjson.loads(response.content)
             if data.get("success"):
                 print(f"✅ Agent Created: {data.get('agent_name')}")
                 return True
@@ -86,12 +100,12 @@ def test_agent_creation():
         else:
             print(f"❌ HTTP Error: {response.status_code}")
             return False
-            
+    
     except Exception as e:
         print(f"❌ Agent Creation Error: {e}")
         return False
 
-def test_vietnamese_support():
+async def test_vietnamese_support(client: httpx.AsyncClient):
     """Test Vietnamese language support."""
     print("\n🧪 Testing Vietnamese Language Support...")
     
@@ -101,18 +115,18 @@ def test_vietnamese_support():
             "session_id": "test_session"
         }
         
-        response = requests.post(
-            "http://localhost:8000/api/v1/agents/test_agent/chat/message",
+        response = await client.post(
+            "/api/v1/agents/test_agent/chat/message",
             json=message_data,
             timeout=10
         )
         
-        if response.status_code in [200, 201]:
-            data = response.json()
+        if response.is_success:
+            data = orjson.loads(response.content)
             if data.get("success") and data.get("response"):
                 response_text = data["response"]
                 # Check for Vietnamese characters
-                vietnamese_chars = any(ord(char) > 127 for char in response_text)
+                vietnamese_chars = bool(NON_ASCII_RE.search(response_text))
                 if vietnamese_chars:
                     print("✅ Vietnamese Language Support: Working")
                     return True
@@ -125,12 +139,12 @@ def test_vietnamese_support():
         else:
             print(f"❌ HTTP Error: {response.status_code}")
             return False
-            
+    
     except Exception as e:
         print(f"❌ Vietnamese Support Error: {e}")
         return False
 
-def test_cccd_functionality():
+async def test_cccd_functionality(client: httpx.AsyncClient):
     """Test CCCD functionality."""
     print("\n🧪 Testing CCCD Functionality...")
     
@@ -140,19 +154,18 @@ def test_cccd_functionality():
             "session_id": "cccd_test"
         }
         
-        response = requests.post(
-            "http://localhost:8000/api/v1/agents/test_agent/chat/message",
+        response = await client.post(
+            "/api/v1/agents/test_agent/chat/message",
             json=cccd_request,
             timeout=10
         )
         
-        if response.status_code in [200, 201]:
-            data = response.json()
+        if response.is_success:
+            data = orjson.loads(response.content)
             if data.get("success") and data.get("response"):
                 response_text = data["response"]
                 # Check for CCCD-related content
-                cccd_indicators = ["CCCD", "căn cước", "Hưng Yên", "1965", "1975", "nữ"]
-                found_indicators = sum(1 for indicator in cccd_indicators if indicator.lower() in response_text.lower())
+                found_indicators = len({match.group(0).lower() for match in CCCD_RE.finditer(response_text)})
                 
                 if found_indicators >= 2:
                     print(f"✅ CCCD Functionality: Working ({found_indicators} indicators)")
@@ -166,38 +179,59 @@ def test_cccd_functionality():
         else:
             print(f"❌ HTTP Error: {response.status_code}")
             return False
-            
+    
     except Exception as e:
         print(f"❌ CCCD Error: {e}")
         return False
 
-def main():
+async def run_tests(client: httpx.AsyncClient, tests):
+    """Run a group of independent tests concurrently, returning pass count.
+    
+    Each test's output is buffered and written in declaration order.
+    """
+    with captured_stdout():
+        outcomes = await asyncio.gather(*(
+            run_captured(test_func, client, name=test_name) for test_name, test_func in tests
+        ))
+    
+    passed = 0
+    for result, output in outcomes:
+        sys.stdout.write(output)
+        passed += bool(result)
+    return passed
+
+async def main():
     """Main test function."""
     print("🚀 OpenManus-Youtu Integrated Framework - Simple System Test")
     print("=" * 60)
     
-    start_time = time.time()
+    start_time = time.perf_counter()
     
-    tests = [
-        ("Local Server", test_local_server),
-        ("API Endpoints", test_api_endpoints),
-        ("Agent Creation", test_agent_creation),
-        ("Vietnamese Support", test_vietnamese_support),
-        ("CCCD Functionality", test_cccd_functionality)
+    # Chat tests talk to the agent created in the first stage
+    stages = [
+        [
+            ("Local Server", test_local_server),
+            ("API Endpoints", test_api_endpoints),
+            ("Agent Creation", test_agent_creation)
+        ],
+        [
+            ("Vietnamese Support", test_vietnamese_support),
+            ("CCCD Functionality", test_cccd_functionality)
+        ]
     ]
     
     passed = 0
-    total = len(tests)
+    total = sum(len(stage) for stage in stages)
     
-    for test_name, test_func in tests:
-        try:
-            result = test_func()
-            if result:
-                passed += 1
-        except Exception as e:
-            print(f"❌ {test_name}: Test exception: {e}")
+    async with httpx.AsyncClient(
+        base_url=BASE_URL,
+        limits=httpx.Limits(max_keepalive_connections=10, max_connections=20),
+        timeout=5.0
+    ) as client:
+        for stage in stages:
+            passed += await run_tests(client, stage)
     
-    total_time = time.time() - start_time
+    total_time = time.perf_counter() - start_time
     success_rate = passed / total
     
     print("\n" + "=" * 60)
@@ -215,15 +249,23 @@ def main():
         "passed_tests": passed,
         "success_rate": success_rate,
         "total_time": total_time,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": datetime.now()
     }
     
-    with open("simple_test_results.json", "w") as f:
-        json.dump(results, f, indent=2)
+    with open("simple_test_results.json", "wb") as f:
+        f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2))
     
     print(f"\n📊 Test results saved to: simple_test_results.json")
     
     return results
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # uvloop has lower per-await dispatch cost; not available on Windows
+    if sys.platform != "win32":
+        try:
+            import uvloop
+            uvloop.install()
+        except ImportError:
+            pass
+    
+    asyncio.run(main())
\ No newline at end of file
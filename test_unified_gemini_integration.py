@@ -5,16 +5,23 @@ Test the complete integration of Gemini AI into the UnifiedAgent framework
 """
 
 import asyncio
+import contextlib
+import io
 import json
+import httpx
 import sys
 import os
+import weakref
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 
-# Add src to path
-sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+# Add src to path once
+_SRC_PATH = os.path.join(os.path.dirname(__file__), 'src')
+if _SRC_PATH not in sys.path:
+    sys.path.insert(0, _SRC_PATH)
 
 # Direct imports for testing
+from script_output import captured_stdout, run_captured
 from src.ai.unified_gemini_agent import UnifiedGeminiAgent, GeminiAgentConfig, create_unified_gemini_agent
 from src.agents.gemini_agent_factory import GeminiAgentFactory, GeminiAgentManager
 from src.tools.gemini_tools import (
@@ -23,21 +30,161 @@ from src.tools.gemini_tools import (
     create_gemini_code_generation_tool
 )
 
+# Factory is stateless; build it once and share across suites
+FACTORY = GeminiAgentFactory()
+
+# One connection pool shared by every agent the suites create; agents leave it
+# open on close() and main() closes it once all suites have finished
+HTTP_CLIENT = httpx.AsyncClient(
+    http2=True,
+    timeout=30,
+    limits=httpx.Limits(max_connections=32, max_keepalive_connections=32)
+)
+
+# Placeholder credentials and model shared by the offline suites
+TEST_API_KEY = "test_api_key"
+TEST_MODEL = "gemini-1.5-flash"
+
+# (agent_type, expected_name, agent name, description), formatted once
+_AGENT_SPECS = tuple(
+    (agent_type, expected_name, f"test_{agent_type}_agent", f"Test {expected_name}")
+    for agent_type, expected_name in (
+        ("cccd", "CCCD Agent"),
+        ("tax", "Tax Agent"),
+        ("data_analysis", "Data Analysis Agent"),
+        ("web_automation", "Web Automation Agent"),
+        ("general", "General Purpose Agent")
+    )
+)
+
+_MANAGER_AGENTS = (
+    ("cccd", "test_cccd_manager"),
+    ("general", "test_general_manager")
+)
+
+_TOOL_SPECS = (
+    ("chat", create_gemini_chat_tool),
+    ("function_calling", create_gemini_function_calling_tool),
+    ("code_generation", create_gemini_code_generation_tool)
+)
+
+# Upper bound for any single agent step, so a hung API call cannot stall a suite
+STEP_TIMEOUT = 10
+
+# Capabilities are fixed for an agent's lifetime; weak keys let collected agents drop out
+_capabilities_cache: "weakref.WeakKeyDictionary[UnifiedGeminiAgent, Dict[str, Any]]" = weakref.WeakKeyDictionary()
+
+async def get_capabilities(agent: UnifiedGeminiAgent) -> Dict[str, Any]:
+    """Return the agent's capabilities, querying the agent only once."""
+    capabilities = _capabilities_cache.get(agent)
+    if capabilities is None:
+        capabilities = _capabilities_cache[agent] = await agent.get_capabilities()
+    return capabilities
+
+async def close_agent(agent: UnifiedGeminiAgent):
+    """Close an agent and forget its cached capabilities."""
+    _capabilities_cache.pop(agent, None)
+    await agent.close()
+
+async def create_custom_agent(name: str, description: str, api_key: str = TEST_API_KEY) -> UnifiedGeminiAgent:
+    """Create a custom agent on the shared HTTP client."""
+    return await FACTORY.create_custom_agent(
+        name=name,
+        description=description,
+        api_key=api_key,
+        http_client=HTTP_CLIENT,
+        model=TEST_MODEL
+    )
+
+# Agents that suites only read from are built once per type and shared;
+# main() closes them through the manager after all suites have finished
+_SHARED_MANAGER = GeminiAgentManager()
+_SHARED_AGENTS: Dict[str, "asyncio.Task[UnifiedGeminiAgent]"] = {}
+
+async def get_shared_agent(agent_type: str) -> UnifiedGeminiAgent:
+    """Return the shared agent of a type, creating it on first use."""
+    task = _SHARED_AGENTS.get(agent_type)
+    if task is None:
+        task = _SHARED_AGENTS[agent_type] = asyncio.create_task(
+            _SHARED_MANAGER.create_agent(
+                agent_type=agent_type,
+                api_key=TEST_API_KEY,
+                http_client=HTTP_CLIENT
+            )
+        )
+    # Shield so one caller timing out does not cancel creation for the others
+    return await asyncio.shield(task)
+
+# Reusable buffers for streamed replies, so repeated drains don't reallocate
+_BUF_POOL: List[io.StringIO] = []
+
+def acquire_buf() -> io.StringIO:
+    """Take an empty buffer from the pool, or a new one if the pool is empty."""
+    return _BUF_POOL.pop() if _BUF_POOL else io.StringIO()
+
+def release_buf(buffer: io.StringIO):
+    """Reset a buffer and return it to the pool."""
+    buffer.seek(0)
+    buffer.truncate()
+    _BUF_POOL.append(buffer)
+
+def format_agent_listing(agents_info: List[Dict[str, Any]]) -> str:
+    """Format manager listing entries as one indented line per agent."""
+    return "\n".join([f"   - {info['name']}: {info['status']}" for info in agents_info])
+
+def format_names(names) -> str:
+    """Format names as one indented bullet line each."""
+    return "\n".join([f"   - {name}" for name in names])
+
+async def _drain(agent, prompt: str, user_id: str, session_id: str) -> Tuple[str, int]:
+    """Consume a streamed reply on its own task through a bounded queue.
+    
+    Returns the full reply text and the number of chunks received. If the
+    consumer stops early (timeout or error) the producer is cancelled.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=64)
+    
+    async def produce():
+        try:
+            async for chunk in agent.process_message(prompt, user_id, session_id, stream=True):
+                await queue.put(chunk)
+        finally:
+            # A cancelled producer has no reader left to wake, and a full
+            # queue would block it forever
+            if not asyncio.current_task().cancelling():
+                await queue.put(None)
+    
+    producer = asyncio.create_task(produce())
+    buffer = acquire_buf()
+    try:
+        chunk_count = 0
+        while (chunk := await queue.get()) is not None:
+            buffer.write(chunk)
+            chunk_count += 1
+        await producer
+        return buffer.getvalue(), chunk_count
+    finally:
+        if not producer.done():
+            producer.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await producer
+        release_buf(buffer)
+
 async def test_unified_gemini_agent():
     """Test Unified Gemini Agent creation and functionality."""
     print("🧪 Testing Unified Gemini Agent...")
     
     try:
-        # Test agent creation with factory
-        factory = GeminiAgentFactory()
-        
-        # Test CCCD Agent creation
+        # Test CCCD Agent creation; this suite writes to the agent's context,
+        # so it gets its own agent rather than the shared one
         print("🔄 Creating CCCD Agent...")
-        cccd_agent = await factory.create_cccd_agent(
-            api_key="test_api_key",  # Replace with real API key for testing
-            model="gemini-1.5-flash",
-            temperature=0.3
-        )
+        async with asyncio.timeout(STEP_TIMEOUT):
+            cccd_agent = await FACTORY.create_cccd_agent(
+                api_key=TEST_API_KEY,  # Replace with real API key for testing
+                http_client=HTTP_CLIENT,
+                model=TEST_MODEL,
+                temperature=0.3
+            )
         
         print(f"✅ CCCD Agent created: {cccd_agent.name}")
         print(f"   Description: {cccd_agent.description}")
@@ -45,33 +192,38 @@ async def test_unified_gemini_agent():
         print(f"   Temperature: {cccd_agent.gemini_config.temperature}")
         
         # Test capabilities
-        capabilities = await cccd_agent.get_capabilities()
+        async with asyncio.timeout(STEP_TIMEOUT):
+            capabilities = await get_capabilities(cccd_agent)
         print(f"✅ Agent capabilities: {len(capabilities.get('capabilities', {}))} features")
         
         # Test message processing (will fail with test key, but should not crash)
         try:
             print("🔄 Testing message processing...")
-            response_chunks = []
-            async for chunk in cccd_agent.process_message(
-                "Tạo 100 CCCD cho tỉnh Hưng Yên, giới tính nữ, năm sinh 1965-1975",
-                "test_user",
-                "test_session",
-                stream=False
-            ):
-                response_chunks.append(chunk)
+            async with asyncio.timeout(STEP_TIMEOUT):
+                _, chunk_count = await _drain(
+                    cccd_agent,
+                    "Tạo 100 CCCD cho tỉnh Hưng Yên, giới tính nữ, năm sinh 1965-1975",
+                    "test_user",
+                    "test_session"
+                )
             
-            if response_chunks:
-                print(f"✅ Message processing: {len(response_chunks)} chunks received")
+            if chunk_count:
+                print(f"✅ Message processing: {chunk_count} chunks received")
             else:
                 print("✅ Message processing: No chunks (expected with test key)")
                 
+        except TimeoutError:
+            print(f"✅ Message processing: Timed out after {STEP_TIMEOUT}s (expected with test key)")
         except Exception as e:
             print(f"✅ Message processing: Failed (expected with test key) - {e}")
         
         # Cleanup
-        await cccd_agent.close()
+        async with asyncio.timeout(STEP_TIMEOUT):
+            await close_agent(cccd_agent)
         print("✅ CCCD Agent cleanup: Success")
         
+    except TimeoutError:
+        print(f"❌ Unified Gemini Agent test timed out after {STEP_TIMEOUT}s")
     except Exception as e:
         print(f"❌ Unified Gemini Agent test failed: {e}")
     
@@ -82,40 +234,37 @@ async def test_agent_factory():
     print("🧪 Testing Agent Factory...")
     
     try:
-        factory = GeminiAgentFactory()
-        
-        # Test different agent types
-        agent_types = [
-            ("cccd", "CCCD Agent"),
-            ("tax", "Tax Agent"),
-            ("data_analysis", "Data Analysis Agent"),
-            ("web_automation", "Web Automation Agent"),
-            ("general", "General Purpose Agent")
-        ]
-        
-        for agent_type, expected_name in agent_types:
-            print(f"🔄 Testing {agent_type} agent creation...")
+        async def _one(agent_type: str, name: str, description: str) -> List[str]:
+            lines = [f"🔄 Testing {agent_type} agent creation..."]
             
             try:
-                agent = await factory.create_custom_agent(
-                    name=f"test_{agent_type}_agent",
-                    description=f"Test {expected_name}",
-                    api_key="test_api_key",
-                    model="gemini-1.5-flash"
-                )
+                async with asyncio.timeout(STEP_TIMEOUT):
+                    agent = await create_custom_agent(name, description)
                 
-                print(f"✅ {agent_type} agent created: {agent.name}")
+                lines.append(f"✅ {agent_type} agent created: {agent.name}")
                 
                 # Test capabilities
-                capabilities = await agent.get_capabilities()
-                print(f"   Capabilities: {len(capabilities.get('capabilities', {}))} features")
+                async with asyncio.timeout(STEP_TIMEOUT):
+                    capabilities = await get_capabilities(agent)
+                lines.append(f"   Capabilities: {len(capabilities.get('capabilities', {}))} features")
                 
                 # Cleanup
-                await agent.close()
-                print(f"✅ {agent_type} agent cleanup: Success")
+                async with asyncio.timeout(STEP_TIMEOUT):
+                    await close_agent(agent)
+                lines.append(f"✅ {agent_type} agent cleanup: Success")
                 
+            except TimeoutError:
+                lines.append(f"❌ {agent_type} agent timed out after {STEP_TIMEOUT}s")
             except Exception as e:
-                print(f"❌ {agent_type} agent creation failed: {e}")
+                lines.append(f"❌ {agent_type} agent creation failed: {e}")
+            
+            return lines
+        
+        # Create all agent types concurrently, then report in order
+        async with asyncio.TaskGroup() as tg:
+            tasks = [tg.create_task(_one(t, name, desc)) for t, _, name, desc in _AGENT_SPECS]
+        for task in tasks:
+            print("\n".join(task.result()))
         
     except Exception as e:
         print(f"❌ Agent Factory test failed: {e}")
@@ -132,31 +281,36 @@ async def test_agent_manager():
         # Test agent creation through manager
         print("🔄 Creating agents through manager...")
         
-        test_agents = [
-            ("cccd", "test_cccd_manager"),
-            ("general", "test_general_manager")
-        ]
-        
-        for agent_type, agent_name in test_agents:
+        async def _one(agent_type: str, agent_name: str) -> str:
             try:
-                agent = await manager.create_agent(
-                    agent_type=agent_type,
-                    api_key="test_api_key",
-                    name=agent_name
-                )
+                async with asyncio.timeout(STEP_TIMEOUT):
+                    agent = await manager.create_agent(
+                        agent_type=agent_type,
+                        api_key=TEST_API_KEY,
+                        http_client=HTTP_CLIENT,
+                        name=agent_name
+                    )
                 
-                print(f"✅ Manager created {agent_type} agent: {agent.name}")
+                return f"✅ Manager created {agent_type} agent: {agent.name}"
                 
+            except TimeoutError:
+                return f"❌ Manager timed out creating {agent_type} agent after {STEP_TIMEOUT}s"
             except Exception as e:
-                print(f"❌ Manager failed to create {agent_type} agent: {e}")
+                return f"❌ Manager failed to create {agent_type} agent: {e}"
+        
+        # Create the agents concurrently, then report in order
+        async with asyncio.TaskGroup() as tg:
+            tasks = [tg.create_task(_one(t, n)) for t, n in _MANAGER_AGENTS]
+        for task in tasks:
+            print(task.result())
         
         # Test listing agents
         print("🔄 Testing agent listing...")
         agents_list = await manager.list_agents()
         print(f"✅ Manager has {len(agents_list)} agents")
         
-        for agent_info in agents_list:
-            print(f"   - {agent_info['name']}: {agent_info['status']}")
+        if agents_list:
+            print(format_agent_listing(agents_list))
         
         # Test getting specific agent
         if agents_list:
@@ -168,9 +322,12 @@ async def test_agent_manager():
                 print(f"❌ Failed to retrieve agent: {first_agent['name']}")
         
         # Cleanup
-        await manager.close_all_agents()
+        async with asyncio.timeout(STEP_TIMEOUT):
+            await manager.close_all_agents()
         print("✅ Manager cleanup: Success")
         
+    except TimeoutError:
+        print(f"❌ Agent Manager test timed out after {STEP_TIMEOUT}s")
     except Exception as e:
         print(f"❌ Agent Manager test failed: {e}")
     
@@ -184,34 +341,41 @@ async def test_gemini_tools():
         # Test tool creation
         print("🔄 Creating Gemini tools...")
         
-        tools = [
-            ("chat", create_gemini_chat_tool),
-            ("function_calling", create_gemini_function_calling_tool),
-            ("code_generation", create_gemini_code_generation_tool)
-        ]
-        
-        for tool_name, tool_factory in tools:
+        async def _one(tool_name: str, tool_factory) -> List[str]:
+            lines = []
             try:
-                tool = tool_factory("test_api_key", "gemini-1.5-flash")
-                print(f"✅ {tool_name} tool created: {tool.name}")
+                tool = tool_factory(TEST_API_KEY, TEST_MODEL)
+                lines.append(f"✅ {tool_name} tool created: {tool.name}")
                 
                 # Test tool metadata
-                print(f"   Category: {tool.category}")
-                print(f"   Description: {tool.description}")
+                lines.append(f"   Category: {tool.category}")
+                lines.append(f"   Description: {tool.description}")
                 
                 # Test initialization (will fail with test key, but should not crash)
                 try:
-                    initialized = await tool.initialize()
-                    print(f"   Initialization: {'Success' if initialized else 'Failed (expected with test key)'}")
+                    async with asyncio.timeout(STEP_TIMEOUT):
+                        initialized = await tool.initialize()
+                    lines.append(f"   Initialization: {'Success' if initialized else 'Failed (expected with test key)'}")
+                except TimeoutError:
+                    lines.append(f"   Initialization: Timed out after {STEP_TIMEOUT}s (expected with test key)")
                 except Exception as e:
-                    print(f"   Initialization: Failed (expected with test key) - {e}")
+                    lines.append(f"   Initialization: Failed (expected with test key) - {e}")
                 
                 # Cleanup
-                await tool.cleanup()
-                print(f"✅ {tool_name} tool cleanup: Success")
+                async with asyncio.timeout(STEP_TIMEOUT):
+                    await tool.cleanup()
+                lines.append(f"✅ {tool_name} tool cleanup: Success")
                 
             except Exception as e:
-                print(f"❌ {tool_name} tool creation failed: {e}")
+                lines.append(f"❌ {tool_name} tool creation failed: {e}")
+            
+            return lines
+        
+        # Exercise all tools concurrently, then report in order
+        async with asyncio.TaskGroup() as tg:
+            tasks = [tg.create_task(_one(n, f)) for n, f in _TOOL_SPECS]
+        for task in tasks:
+            print("\n".join(task.result()))
         
     except Exception as e:
         print(f"❌ Gemini Tools test failed: {e}")
@@ -223,39 +387,34 @@ async def test_integration_workflow():
     print("🧪 Testing Integration Workflow...")
     
     try:
-        # Create agent manager
-        manager = GeminiAgentManager()
-        
-        # Create a CCCD agent
-        print("🔄 Creating CCCD agent for workflow test...")
-        agent = await manager.create_agent(
-            agent_type="cccd",
-            api_key="test_api_key",
-            name="workflow_test_agent"
-        )
+        # Reuse the shared CCCD agent; this suite only reads from it
+        print("🔄 Getting CCCD agent for workflow test...")
+        async with asyncio.timeout(STEP_TIMEOUT):
+            agent = await get_shared_agent("cccd")
         
         print(f"✅ Workflow agent created: {agent.name}")
         
+        async with asyncio.timeout(STEP_TIMEOUT):
+            capabilities = await get_capabilities(agent)
+        system_prompt = agent._get_system_prompt()
+        handler_names = list(agent.function_handlers)
+        
         # Test agent capabilities
-        capabilities = await agent.get_capabilities()
         print(f"✅ Agent capabilities: {capabilities.get('agent_type')}")
         print(f"   Function calling: {capabilities.get('function_calling_enabled')}")
         print(f"   Streaming: {capabilities.get('streaming_enabled')}")
         print(f"   Available tools: {len(capabilities.get('available_tools', []))}")
         
         # Test system prompt
-        system_prompt = agent._get_system_prompt()
         print(f"✅ System prompt: {len(system_prompt)} characters")
         
         # Test function handlers
-        print(f"✅ Function handlers: {len(agent.function_handlers)} registered")
-        for func_name in agent.function_handlers.keys():
-            print(f"   - {func_name}")
-        
-        # Cleanup
-        await manager.close_all_agents()
-        print("✅ Workflow test cleanup: Success")
+        print(f"✅ Function handlers: {len(handler_names)} registered")
+        if handler_names:
+            print(format_names(handler_names))
         
+    except TimeoutError:
+        print(f"❌ Integration workflow test timed out after {STEP_TIMEOUT}s")
     except Exception as e:
         print(f"❌ Integration workflow test failed: {e}")
     
@@ -277,84 +436,131 @@ async def test_real_api_integration():
     
     try:
         # Create real agent
-        factory = GeminiAgentFactory()
-        agent = await factory.create_general_purpose_agent(
-            api_key=api_key,
-            model="gemini-1.5-flash",
-            temperature=0.7
-        )
+        factory = FACTORY
+        async with asyncio.timeout(STEP_TIMEOUT):
+            agent = await factory.create_general_purpose_agent(
+                api_key=api_key,
+                http_client=HTTP_CLIENT,
+                model=TEST_MODEL,
+                temperature=0.7
+            )
         
         print(f"✅ Real agent created: {agent.name}")
         
         # Test real message processing
         print("🔄 Testing real message processing...")
-        response_chunks = []
-        async for chunk in agent.process_message(
-            "Hello, this is a test message. Please respond with 'Test successful'.",
-            "test_user",
-            "test_session",
-            stream=False
-        ):
-            response_chunks.append(chunk)
+        async with asyncio.timeout(STEP_TIMEOUT):
+            response = await agent.request_message(
+                "Hello, this is a test message. Please respond with 'Test successful'.",
+                "test_user",
+                "test_session"
+            )
         
-        if response_chunks:
-            response = "".join(response_chunks)
+        if response:
             print(f"✅ Real API response: {response[:100]}...")
         else:
             print("❌ No response from real API")
         
         # Test capabilities
-        capabilities = await agent.get_capabilities()
+        async with asyncio.timeout(STEP_TIMEOUT):
+            capabilities = await get_capabilities(agent)
         print(f"✅ Real agent capabilities: {capabilities.get('agent_type')}")
         
         # Cleanup
-        await agent.close()
+        async with asyncio.timeout(STEP_TIMEOUT):
+            await close_agent(agent)
         print("✅ Real API test cleanup: Success")
         
+    except TimeoutError:
+        print(f"❌ Real API integration test timed out after {STEP_TIMEOUT}s")
     except Exception as e:
         print(f"❌ Real API integration test failed: {e}")
     
     print("🧪 Real API Integration test completed\n")
 
+# Closing summary, written together with the suite output in one call
+_SUMMARY = "".join((
+    "=" * 60 + "\n",
+    "🎉 All Unified Gemini Integration Tests Completed!\n",
+    "\n📋 Test Summary:\n",
+    "✅ Unified Gemini Agent - Core agent functionality tested\n",
+    "✅ Agent Factory - Multiple agent types tested\n",
+    "✅ Agent Manager - Agent lifecycle management tested\n",
+    "✅ Gemini Tools - Tool integration tested\n",
+    "✅ Integration Workflow - Complete workflow tested\n",
+    "✅ Real API Integration - Tested with actual API (if key provided)\n",
+    "\n🔧 Integration Features:\n",
+    "✅ Google Gemini AI integration\n",
+    "✅ Function calling support\n",
+    "✅ Streaming responses\n",
+    "✅ Context management\n",
+    "✅ Tool registry integration\n",
+    "✅ Memory management\n",
+    "✅ State tracking\n",
+    "✅ Multiple agent types\n",
+    "✅ Agent lifecycle management\n",
+    "\n🚀 Next Steps:\n",
+    "1. Set GEMINI_API_KEY environment variable for real testing\n",
+    "2. Deploy unified API endpoints\n",
+    "3. Test WebSocket chat interface\n",
+    "4. Test function calling with real modules\n",
+    "5. Performance testing and optimization\n"
+))
+
+# Set GEMINI_SMOKE_ONLY=1 to check imports and module setup without touching the network
+SMOKE_ONLY = os.getenv("GEMINI_SMOKE_ONLY") == "1"
+
+async def _warmup():
+    """Create and close one agent so DNS, TLS and client setup are paid once."""
+    try:
+        async with asyncio.timeout(STEP_TIMEOUT):
+            agent = await create_custom_agent("warmup_agent", "Warmup Agent", os.getenv("GEMINI_API_KEY", "warmup"))
+            await close_agent(agent)
+    except Exception:
+        pass
+
 async def main():
     """Run all integration tests."""
     print("🚀 Starting Unified Gemini Integration Tests\n")
     print("=" * 60)
     
-    await test_unified_gemini_agent()
-    await test_agent_factory()
-    await test_agent_manager()
-    await test_gemini_tools()
-    await test_integration_workflow()
-    await test_real_api_integration()
+    if SMOKE_ONLY:
+        print("⚠️  GEMINI_SMOKE_ONLY=1: imports OK, skipping network tests")
+        await HTTP_CLIENT.aclose()
+        return
     
-    print("=" * 60)
-    print("🎉 All Unified Gemini Integration Tests Completed!")
-    print("\n📋 Test Summary:")
-    print("✅ Unified Gemini Agent - Core agent functionality tested")
-    print("✅ Agent Factory - Multiple agent types tested")
-    print("✅ Agent Manager - Agent lifecycle management tested")
-    print("✅ Gemini Tools - Tool integration tested")
-    print("✅ Integration Workflow - Complete workflow tested")
-    print("✅ Real API Integration - Tested with actual API (if key provided)")
+    # Pay cold-start costs before the suites start competing for them
+    await _warmup()
     
-    print("\n🔧 Integration Features:")
-    print("✅ Google Gemini AI integration")
-    print("✅ Function calling support")
-    print("✅ Streaming responses")
-    print("✅ Context management")
-    print("✅ Tool registry integration")
-    print("✅ Memory management")
-    print("✅ State tracking")
-    print("✅ Multiple agent types")
-    print("✅ Agent lifecycle management")
+    # Suites share no state, so run them concurrently; each suite's output is
+    # buffered and printed in order once all have finished
+    suites = [
+        test_unified_gemini_agent,
+        test_agent_factory,
+        test_agent_manager,
+        test_gemini_tools,
+        test_integration_workflow,
+        test_real_api_integration
+    ]
     
-    print("\n🚀 Next Steps:")
-    print("1. Set GEMINI_API_KEY environment variable for real testing")
-    print("2. Deploy unified API endpoints")
-    print("3. Test WebSocket chat interface")
-    print("4. Test function calling with real modules")
-    print("5. Performance testing and optimization")
+    try:
+        with captured_stdout():
+            outcomes = await asyncio.gather(*(run_captured(suite) for suite in suites))
+    finally:
+        await _SHARED_MANAGER.close_all_agents()
+        await HTTP_CLIENT.aclose()
+    
+    # Emit all buffered suite output and the summary with a single write
+    sys.stdout.write("".join(output for _, output in outcomes) + _SUMMARY)
+    sys.stdout.flush()
 
 if __name__ == "__main__":
+    # uvloop has lower per-await dispatch cost; not available on Windows
+    if sys.platform != "win32":
+        try:
+            import uvloop
+            uvloop.install()
+        except ImportError:
+            pass
+    
     asyncio.run(main())
\ No newline at end of file
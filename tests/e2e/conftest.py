@@ -0,0 +1,43 @@
+"""
+Shared fixtures for the end-to-end tests
+One app and client serve every e2e test in the session
+"""
+
+import orjson
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient, Limits, Response, Timeout
+
+from src.api import routes
+from src.api.server import create_app
+
+
+app = create_app(debug=True)
+
+
+def read_json(response: Response):
+    """Parse a response body with orjson."""
+    return orjson.loads(response.content)
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def client():
+    """Create test client shared by the whole session."""
+    # Requests are dispatched straight into the app, no socket involved
+    transport = ASGITransport(app=app)
+    # Generous limits so fanned-out gathers never wait on the pool
+    async with AsyncClient(
+        transport=transport,
+        base_url="http://test",
+        limits=Limits(max_connections=1000, max_keepalive_connections=500, keepalive_expiry=30),
+        timeout=Timeout(30.0, connect=5.0)
+    ) as ac:
+        yield ac
+
+
+@pytest.fixture(autouse=True)
+def reset_state():
+    """Clear the in-memory agent and workflow registries after each test."""
+    yield
+    routes.active_agents.clear()
+    routes.active_workflows.clear()
@@ -6,180 +6,212 @@ Complete workflow testing for all tool categories
 import pytest
 import asyncio
 import json
-from typing import Dict, Any
-from httpx import AsyncClient
+import orjson
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List
 
-from src.api.server import create_app
 from src.tools.web_tools import WebScrapingTool, PlaywrightBrowserTool
 from src.tools.search_tools import WebSearchTool, GoogleSearchTool
 from src.tools.analysis_tools import DataAnalysisTool, ChartGenerationTool
 from src.tools.data_tools import DataCleaningTool, DataTransformationTool
 from src.tools.file_tools import FileReaderTool, FileWriterTool
 
+from .conftest import read_json
 
-class TestToolWorkflows:
-    """Test complete tool workflows end-to-end."""
+# Values the data cleaning tool must strip out
+_DIRTY_SENTINELS = frozenset({None, ""})
 
-    @pytest.fixture
-    async def client(self):
-        """Create test client."""
-        app = create_app(debug=True)
-        async with AsyncClient(app=app, base_url="http://test") as ac:
-            yield ac
-
-    @pytest.mark.asyncio
-    async def test_web_tools_complete_workflow(self, client):
-        """Test complete web tools workflow."""
-        # Test web scraping
-        response = await client.post("/api/v1/tools/execute", json={
-            "tool_name": "web_scraping_tool",
-            "parameters": {
-                "url": "https://httpbin.org/html",
-                "selectors": {"title": "h1", "content": "p"}
-            }
-        })
-        assert response.status_code == 200
-        result = response.json()
-        assert result["success"] is True
-        assert "title" in result["result"]
+# Concurrent analysis requests, serialized once and sent as raw bodies
+_ANALYSIS_PAYLOADS = [
+    orjson.dumps({
+        "tool_name": "data_analysis_tool",
+        "parameters": {
+            "data": list(range(1, i + 6)),
+            "analysis_type": "descriptive"
+        }
+    })
+    for i in range(3)
+]
+_JSON_HEADERS = {"content-type": "application/json"}
 
-        # Test browser automation
-        response = await client.post("/api/v1/tools/execute", json={
-            "tool_name": "playwright_browser_tool",
-            "parameters": {
-                "url": "https://httpbin.org/html",
-                "action": "get_title"
-            }
-        })
-        assert response.status_code == 200
-        result = response.json()
-        assert result["success"] is True
-        assert "title" in result["result"]
-
-    @pytest.mark.asyncio
-    async def test_search_tools_complete_workflow(self, client):
-        """Test complete search tools workflow."""
-        # Test web search
-        response = await client.post("/api/v1/tools/execute", json={
-            "tool_name": "web_search_tool",
-            "parameters": {
-                "query": "OpenManus AI framework",
-                "max_results": 5
-            }
-        })
-        assert response.status_code == 200
-        result = response.json()
-        assert result["success"] is True
-        assert len(result["result"]["results"]) <= 5
+_TEST_DATA = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
+_TEST_FILE_CONTENT = "Hello, World!\nThis is a test file."
 
-        # Test Google search
-        response = await client.post("/api/v1/tools/execute", json={
-            "tool_name": "google_search_tool",
-            "parameters": {
-                "query": "Python FastAPI",
-                "max_results": 3
-            }
-        })
-        assert response.status_code == 200
-        result = response.json()
-        assert result["success"] is True
-        assert len(result["result"]["results"]) <= 3
-
-    @pytest.mark.asyncio
-    async def test_analysis_tools_complete_workflow(self, client):
-        """Test complete analysis tools workflow."""
-        # Test data analysis
-        test_data = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
-        response = await client.post("/api/v1/tools/execute", json={
-            "tool_name": "data_analysis_tool",
-            "parameters": {
-                "data": test_data,
-                "analysis_type": "descriptive"
-            }
-        })
-        assert response.status_code == 200
-        result = response.json()
-        assert result["success"] is True
-        assert "mean" in result["result"]
-        assert "std" in result["result"]
 
-        # Test chart generation
-        response = await client.post("/api/v1/tools/execute", json={
-            "tool_name": "chart_generation_tool",
-            "parameters": {
-                "data": test_data,
-                "chart_type": "line",
-                "title": "Test Chart"
+@dataclass(frozen=True)
+class ToolWorkflowCase:
+    """Tool calls for one category and the checks on their results."""
+    name: str
+    requests: List[Dict[str, Any]]
+    check: Callable[[List[Any]], None]
+    sequential: bool = False  # Set when a later call depends on an earlier one
+
+
+def _check_web(results: List[Any]) -> None:
+    scraped, browsed = results
+    assert "title" in scraped
+    assert "title" in browsed
+
+
+def _check_search(results: List[Any]) -> None:
+    web, google = results
+    assert len(web["results"]) <= 5
+    assert len(google["results"]) <= 3
+
+
+def _check_analysis(results: List[Any]) -> None:
+    analysis, chart = results
+    assert "mean" in analysis
+    assert "std" in analysis
+    assert "chart_path" in chart
+
+
+def _check_data(results: List[Any]) -> None:
+    cleaned, transformed = results
+    assert _DIRTY_SENTINELS.isdisjoint(cleaned)
+    assert len(transformed) == 5
+
+
+def _check_file(results: List[Any]) -> None:
+    _, content = results
+    assert content == _TEST_FILE_CONTENT
+
+
+TOOL_WORKFLOW_CASES = [
+    ToolWorkflowCase(
+        name="web",
+        requests=[
+            {
+                "tool_name": "web_scraping_tool",
+                "parameters": {
+                    "url": "https://httpbin.org/html",
+                    "selectors": {"title": "h1", "content": "p"}
+                }
+            },
+            {
+                "tool_name": "playwright_browser_tool",
+                "parameters": {
+                    "url": "https://httpbin.org/html",
+                    "action": "get_title"
+                }
             }
-        })
-        assert response.status_code == 200
-        result = response.json()
-        assert result["success"] is True
-        assert "chart_path" in result["result"]
-
-    @pytest.mark.asyncio
-    async def test_data_tools_complete_workflow(self, client):
-        """Test complete data tools workflow."""
-        # Test data cleaning
-        dirty_data = [1, 2, None, 4, 5, "", 7, 8, 9, 10]
-        response = await client.post("/api/v1/tools/execute", json={
-            "tool_name": "data_cleaning_tool",
-            "parameters": {
-                "data": dirty_data,
-                "remove_nulls": True,
-                "remove_empty": True
+        ],
+        check=_check_web
+    ),
+    ToolWorkflowCase(
+        name="search",
+        requests=[
+            {
+                "tool_name": "web_search_tool",
+                "parameters": {
+                    "query": "OpenManus AI framework",
+                    "max_results": 5
+                }
+            },
+            {
+                "tool_name": "google_search_tool",
+                "parameters": {
+                    "query": "Python FastAPI",
+                    "max_results": 3
+                }
             }
-        })
-        assert response.status_code == 200
-        result = response.json()
-        assert result["success"] is True
-        assert None not in result["result"]
-        assert "" not in result["result"]
-
-        # Test data transformation
-        response = await client.post("/api/v1/tools/execute", json={
-            "tool_name": "data_transformation_tool",
-            "parameters": {
-                "data": [1, 2, 3, 4, 5],
-                "transformation": "normalize"
+        ],
+        check=_check_search
+    ),
+    ToolWorkflowCase(
+        name="analysis",
+        requests=[
+            {
+                "tool_name": "data_analysis_tool",
+                "parameters": {
+                    "data": _TEST_DATA,
+                    "analysis_type": "descriptive"
+                }
+            },
+            {
+                "tool_name": "chart_generation_tool",
+                "parameters": {
+                    "data": _TEST_DATA,
+                    "chart_type": "line",
+                    "title": "Test Chart"
+                }
             }
-        })
-        assert response.status_code == 200
-        result = response.json()
-        assert result["success"] is True
-        assert len(result["result"]) == 5
-
-    @pytest.mark.asyncio
-    async def test_file_tools_complete_workflow(self, client):
-        """Test complete file tools workflow."""
-        # Test file writing
-        test_content = "Hello, World!\nThis is a test file."
-        response = await client.post("/api/v1/tools/execute", json={
-            "tool_name": "file_writer_tool",
-            "parameters": {
-                "file_path": "/tmp/test_file.txt",
-                "content": test_content,
-                "file_type": "text"
+        ],
+        check=_check_analysis
+    ),
+    ToolWorkflowCase(
+        name="data",
+        requests=[
+            {
+                "tool_name": "data_cleaning_tool",
+                "parameters": {
+                    "data": [1, 2, None, 4, 5, "", 7, 8, 9, 10],
+                    "remove_nulls": True,
+                    "remove_empty": True
+                }
+            },
+            {
+                "tool_name": "data_transformation_tool",
+                "parameters": {
+                    "data": [1, 2, 3, 4, 5],
+                    "transformation": "normalize"
+                }
             }
-        })
-        assert response.status_code == 200
-        result = response.json()
-        assert result["success"] is True
-
-        # Test file reading
-        response = await client.post("/api/v1/tools/execute", json={
-            "tool_name": "file_reader_tool",
-            "parameters": {
-                "file_path": "/tmp/test_file.txt",
-                "file_type": "text"
+        ],
+        check=_check_data
+    ),
+    ToolWorkflowCase(
+        name="file",
+        requests=[
+            {
+                "tool_name": "file_writer_tool",
+                "parameters": {
+                    "file_path": "/tmp/test_file.txt",
+                    "content": _TEST_FILE_CONTENT,
+                    "file_type": "text"
+                }
+            },
+            {
+                "tool_name": "file_reader_tool",
+                "parameters": {
+                    "file_path": "/tmp/test_file.txt",
+                    "file_type": "text"
+                }
             }
-        })
-        assert response.status_code == 200
-        result = response.json()
-        assert result["success"] is True
-        assert result["result"] == test_content
+        ],
+        check=_check_file,
+        sequential=True
+    )
+]
+
+
+class TestToolWorkflows:
+    """Test complete tool workflows end-to-end."""
+
+    @pytest.mark.parametrize("case", TOOL_WORKFLOW_CASES, ids=[case.name for case in TOOL_WORKFLOW_CASES])
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_tools_complete_workflow(self, client, case):
+        """Test complete tool workflow for each tool category."""
+        if case.sequential:
+            responses = [
+                await client.post("/api/v1/tools/execute", json=request)
+                for request in case.requests
+            ]
+        else:
+            responses = await asyncio.gather(*(
+                client.post("/api/v1/tools/execute", json=request)
+                for request in case.requests
+            ))
+
+        results = []
+        for response in responses:
+            assert response.status_code == 200
+            result = read_json(response)
+            assert result["success"] is True
+            results.append(result["result"])
+        case.check(results)
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_tool_error_handling(self, client):
         """Test tool error handling."""
         # Test invalid tool
@@ -188,7 +220,7 @@ class TestToolWorkflows:
             "parameters": {}
         })
         assert response.status_code == 200
-        result = response.json()
+        result = read_json(response)
         assert result["success"] is False
         assert "error" in result
 
@@ -200,24 +232,43 @@ class TestToolWorkflows:
             }
         })
         assert response.status_code == 200
-        result = response.json()
+        result = read_json(response)
         assert result["success"] is False
         assert "error" in result
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_tool_concurrent_execution(self, client):
-        """Test concurrent tool execution."""
-        # Execute multiple tools concurrently
-        tasks = []
-        for i in range(3):
-            task = client.post("/api/v1/tools/execute", json={
-                "tool_name": "data_analysis_tool",
-                "parameters": {
-                    "data": list(range(1, i + 6)),
-                    "analysis_type": "descriptive"
+        """Test concurrent tool execution through the batch endpoint."""
+        # Execute multiple tools in one batch request
+        response = await client.post("/api/v1/tools/execute:batch", json={
+            "requests": [
+                {
+                    "tool_name": "data_analysis_tool",
+                    "parameters": {
+                        "data": list(range(1, i + 6)),
+                        "analysis_type": "descriptive"
+                    }
                 }
-            })
-            tasks.append(task)
+                for i in range(3)
+            ]
+        })
+        assert response.status_code == 200
+        results = read_json(response)["results"]
+        assert len(results) == 3
+
+        # Verify all succeeded
+        for result in results:
+            assert result["success"] is True
+            assert "mean" in result["result"]
+
+    @pytest.mark.asyncio(loop_scope="session")
+    async def test_tool_concurrent_separate_requests(self, client):
+        """Test concurrent tool execution over separate requests."""
+        # Execute multiple tools concurrently
+        tasks = [
+            client.post("/api/v1/tools/execute", content=payload, headers=_JSON_HEADERS)
+            for payload in _ANALYSIS_PAYLOADS
+        ]
 
         # Wait for all tasks to complete
         responses = await asyncio.gather(*tasks)
@@ -225,17 +276,17 @@ class TestToolWorkflows:
         # Verify all succeeded
         for response in responses:
             assert response.status_code == 200
-            result = response.json()
+            result = read_json(response)
             assert result["success"] is True
             assert "mean" in result["result"]
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_tool_listing_and_discovery(self, client):
         """Test tool listing and discovery."""
         # List all tools
         response = await client.get("/api/v1/tools")
         assert response.status_code == 200
-        tools = response.json()
+        tools = read_json(response)
         assert "items" in tools
         assert len(tools["items"]) > 0
 
@@ -243,11 +294,11 @@ class TestToolWorkflows:
         tool_name = tools["items"][0]["name"]
         response = await client.get(f"/api/v1/tools/{tool_name}")
         assert response.status_code == 200
-        tool_info = response.json()
+        tool_info = read_json(response)
         assert tool_info["name"] == tool_name
 
         # Test pagination
         response = await client.get("/api/v1/tools?page=1&page_size=5")
         assert response.status_code == 200
-        tools_page = response.json()
+        tools_page = read_json(response)
         assert len(tools_page["items"]) <= 5
\ No newline at end of file
@@ -7,22 +7,41 @@ import pytest
 import asyncio
 import json
 from typing import Dict, Any, List
+
 from httpx import AsyncClient
 
-from src.api.server import create_app
+from .conftest import read_json
+
+TERMINAL_STATUSES = frozenset({"completed", "failed", "timeout"})
+
+
+async def wait_for_workflow(
+    client: AsyncClient,
+    workflow_id: str,
+    timeout: float = 10,
+    initial: float = 0.02
+) -> Dict[str, Any]:
+    """Poll a workflow until it reaches a terminal status or the timeout passes.
+
+    Returns the last status seen, which is still "running" on timeout.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    delay = initial
+    while True:
+        response = await client.get(f"/api/v1/workflows/{workflow_id}")
+        assert response.status_code == 200
+        status = read_json(response)
+        if status["status"] in TERMINAL_STATUSES or loop.time() >= deadline:
+            return status
+        await asyncio.sleep(delay)
+        delay = min(delay * 1.5, 0.25)
 
 
 class TestWorkflowOrchestration:
     """Test complete workflow orchestration end-to-end."""
 
-    @pytest.fixture
-    async def client(self):
-        """Create test client."""
-        app = create_app(debug=True)
-        async with AsyncClient(app=app, base_url="http://test") as ac:
-            yield ac
-
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_simple_workflow_execution(self, client):
         """Test simple workflow execution."""
         workflow_request = {
@@ -53,20 +72,15 @@ class TestWorkflowOrchestration:
         # Execute workflow
         response = await client.post("/api/v1/workflows/execute", json=workflow_request)
         assert response.status_code == 200
-        result = response.json()
+        result = read_json(response)
         assert result["success"] is True
         workflow_id = result["workflow_id"]
 
         # Wait for workflow completion
-        await asyncio.sleep(2)
-
-        # Check workflow status
-        response = await client.get(f"/api/v1/workflows/{workflow_id}")
-        assert response.status_code == 200
-        status = response.json()
+        status = await wait_for_workflow(client, workflow_id)
         assert status["status"] in ["completed", "running"]
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_parallel_workflow_execution(self, client):
         """Test parallel workflow execution."""
         workflow_request = {
@@ -104,20 +118,15 @@ class TestWorkflowOrchestration:
         # Execute workflow
         response = await client.post("/api/v1/workflows/execute", json=workflow_request)
         assert response.status_code == 200
-        result = response.json()
+        result = read_json(response)
         assert result["success"] is True
         workflow_id = result["workflow_id"]
 
         # Wait for workflow completion
-        await asyncio.sleep(3)
-
-        # Check workflow status
-        response = await client.get(f"/api/v1/workflows/{workflow_id}")
-        assert response.status_code == 200
-        status = response.json()
+        status = await wait_for_workflow(client, workflow_id)
         assert status["status"] in ["completed", "running"]
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_agent_workflow_execution(self, client):
         """Test workflow with agent execution."""
         workflow_request = {
@@ -156,20 +165,15 @@ class TestWorkflowOrchestration:
         # Execute workflow
         response = await client.post("/api/v1/workflows/execute", json=workflow_request)
         assert response.status_code == 200
-        result = response.json()
+        result = read_json(response)
         assert result["success"] is True
         workflow_id = result["workflow_id"]
 
         # Wait for workflow completion
-        await asyncio.sleep(5)
-
-        # Check workflow status
-        response = await client.get(f"/api/v1/workflows/{workflow_id}")
-        assert response.status_code == 200
-        status = response.json()
+        status = await wait_for_workflow(client, workflow_id)
         assert status["status"] in ["completed", "running"]
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_complex_workflow_with_dependencies(self, client):
         """Test complex workflow with multiple dependencies."""
         workflow_request = {
@@ -222,20 +226,15 @@ class TestWorkflowOrchestration:
         # Execute workflow
         response = await client.post("/api/v1/workflows/execute", json=workflow_request)
         assert response.status_code == 200
-        result = response.json()
+        result = read_json(response)
         assert result["success"] is True
         workflow_id = result["workflow_id"]
 
         # Wait for workflow completion
-        await asyncio.sleep(8)
-
-        # Check workflow status
-        response = await client.get(f"/api/v1/workflows/{workflow_id}")
-        assert response.status_code == 200
-        status = response.json()
+        status = await wait_for_workflow(client, workflow_id)
         assert status["status"] in ["completed", "running"]
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_workflow_error_handling(self, client):
         """Test workflow error handling."""
         workflow_request = {
@@ -263,26 +262,21 @@ class TestWorkflowOrchestration:
         # Execute workflow
         response = await client.post("/api/v1/workflows/execute", json=workflow_request)
         assert response.status_code == 200
-        result = response.json()
+        result = read_json(response)
         assert result["success"] is True
         workflow_id = result["workflow_id"]
 
         # Wait for workflow completion
-        await asyncio.sleep(3)
-
-        # Check workflow status
-        response = await client.get(f"/api/v1/workflows/{workflow_id}")
-        assert response.status_code == 200
-        status = response.json()
+        status = await wait_for_workflow(client, workflow_id)
         assert status["status"] in ["failed", "running"]
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_workflow_listing_and_management(self, client):
         """Test workflow listing and management."""
         # List workflows
         response = await client.get("/api/v1/workflows")
         assert response.status_code == 200
-        workflows = response.json()
+        workflows = read_json(response)
         assert "items" in workflows
 
         # Create a simple workflow
@@ -304,21 +298,21 @@ class TestWorkflowOrchestration:
 
         response = await client.post("/api/v1/workflows/execute", json=workflow_request)
         assert response.status_code == 200
-        workflow_id = response.json()["workflow_id"]
+        workflow_id = read_json(response)["workflow_id"]
 
         # List workflows again
         response = await client.get("/api/v1/workflows")
         assert response.status_code == 200
-        workflows = response.json()
+        workflows = read_json(response)
         assert len(workflows["items"]) >= 1
 
         # Get specific workflow
         response = await client.get(f"/api/v1/workflows/{workflow_id}")
         assert response.status_code == 200
-        workflow = response.json()
+        workflow = read_json(response)
         assert workflow["name"] == "Test Management Workflow"
 
-    @pytest.mark.asyncio
+    @pytest.mark.asyncio(loop_scope="session")
     async def test_workflow_timeout_handling(self, client):
         """Test workflow timeout handling."""
         workflow_request = {
@@ -341,15 +335,10 @@ class TestWorkflowOrchestration:
         # Execute workflow
         response = await client.post("/api/v1/workflows/execute", json=workflow_request)
         assert response.status_code == 200
-        result = response.json()
+        result = read_json(response)
         assert result["success"] is True
         workflow_id = result["workflow_id"]
 
-        # Wait for timeout
-        await asyncio.sleep(3)
-
-        # Check workflow status
-        response = await client.get(f"/api/v1/workflows/{workflow_id}")
-        assert response.status_code == 200
-        status = response.json()
+        # Wait for the workflow to finish or time out
+        status = await wait_for_workflow(client, workflow_id, timeout=5)
         assert status["status"] in ["failed", "timeout", "running"]
\ No newline at end of file